@@ -0,0 +1,49 @@
+"""Import-time benchmark for smart_list.
+
+Runs each statement in fresh interpreters and reports the median wall time
+above a bare interpreter start, along with whether wx got imported.
+
+Usage: python bench_import.py [runs]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    "import smart_list",
+    "from smart_list import Column, SmartList, VirtualSmartList",
+    "from smart_list import SQLiteSource, StreamSource, FileSource",
+]
+
+
+def run(statement):
+    code = "%s\nimport sys\nprint('wx' in sys.modules)" % statement
+    start = time.perf_counter()
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return time.perf_counter() - start, output.strip() == b"True"
+
+
+def median_time(statement, runs):
+    times = []
+    loaded_wx = False
+    for _ in range(runs):
+        elapsed, loaded_wx = run(statement)
+        times.append(elapsed)
+    return statistics.median(times), loaded_wx
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    baseline, _ = median_time("pass", runs)
+    print("interpreter startup: %.1f ms" % (baseline * 1000))
+    for statement in STATEMENTS:
+        elapsed, loaded_wx = median_time(statement, runs)
+        print(
+            "%-60s %+7.1f ms  wx imported: %s"
+            % (statement, (elapsed - baseline) * 1000, loaded_wx)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,39 @@
 from __future__ import absolute_import
 
-from .smart_list import Column, SmartList, VirtualSmartList
+import importlib
+
+# Public names and the submodules defining them. Submodules are imported on
+# first attribute access so that "import smart_list" stays cheap; wx itself
+# is only imported when the first list is created.
+_exports = {
+    "Column": "smart_list",
+    "SmartList": "smart_list",
+    "VirtualSmartList": "smart_list",
+    "FileSource": "file_source",
+    "split_csv": "file_source",
+    "split_line": "file_source",
+    "Observable": "observable",
+    "ObservableDict": "observable",
+    "PageCache": "page_cache",
+    "SQLiteSource": "sqlite_source",
+    "StreamSource": "stream_source",
+    "Snapshot": "warm_start",
+}
+
+__all__ = sorted(_exports) + ["find_datafiles"]
+
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
 
 
 def find_datafiles():
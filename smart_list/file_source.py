@@ -0,0 +1,194 @@
+"""Line-indexed file source for VirtualSmartList.
+
+Displays line-oriented files (logs, CSV) of any size without reading them
+into memory. A background thread builds a compact index of line offsets
+while the list is already showing the first rows; only rows actually
+requested by the list are decoded and split into column values.
+"""
+from __future__ import absolute_import
+
+import csv
+import logging
+import os
+import threading
+import time
+from array import array
+
+from .unified_list import load_backend
+
+logger = logging.getLogger(__name__)
+
+
+def split_line(line):
+    """Default splitter: the whole line as a single column (index 0)."""
+    return (line,)
+
+
+def split_csv(line):
+    """Splitter parsing a single CSV record."""
+    return next(csv.reader([line]), [])
+
+
+class FileSource(object):
+    """Virtual list source backed by a text file read on demand.
+
+    Each row is one line of the file. Line start offsets are stored in an
+    array('Q') built incrementally by a background thread, which grows the
+    attached list's item count as indexing proceeds, so first paint does not
+    depend on the file size. Rows are passed through splitter, whose result
+    is the model handed to columns; with the default splitter or split_csv,
+    use integer model fields (Column(title="Host", model_field=0)).
+
+    Rows are read with positioned reads rather than through a memory map,
+    since touching a mapping past the end of a file truncated underneath it
+    (as logrotate's copytruncate does) kills the process with SIGBUS. Rows
+    that are gone raise IndexError until the indexer notices the truncation
+    and reindexes.
+
+    Args:
+        path: File to display
+        splitter: Callable(line) returning the model for a decoded line
+        encoding: Text encoding of the file
+        errors: Decoding error handler
+        follow: Keep watching the file for appended lines (like tail -f)
+        poll_interval: Seconds between size checks when following
+        block_size: Bytes scanned per indexing step
+
+    Example:
+        source = FileSource("access.log", splitter=str.split, follow=True)
+        lst = VirtualSmartList(parent=panel, source=source)
+        lst.set_columns([Column("Host", model_field=0)])
+    """
+
+    report_interval = 0.25
+
+    def __init__(
+        self,
+        path,
+        splitter=None,
+        encoding="utf-8",
+        errors="replace",
+        follow=False,
+        poll_interval=0.5,
+        block_size=1 << 20,
+    ):
+        self.path = path
+        self.splitter = splitter or split_line
+        self.encoding = encoding
+        self.errors = errors
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.block_size = block_size
+        self.offsets = array("Q", [0])
+        self.indexed = False
+        self.view = None
+        self._file = open(path, "rb", buffering=0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reporting = False
+        self._reset = False
+
+    @property
+    def count(self):
+        return len(self.offsets) - 1
+
+    def attach(self, view):
+        """Bind to a VirtualSmartList and start indexing in the background."""
+        self.view = view
+        view.update_count(self.count)
+        self._thread = threading.Thread(
+            target=self._index, name="smart_list file indexer"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def get_virtual_item(self, index):
+        return self.update_cache(index, index)[0]
+
+    def update_cache(self, from_row, to_row):
+        offsets = self.offsets
+        to_row = min(to_row, len(offsets) - 2)
+        if from_row < 0 or from_row > to_row:
+            raise IndexError("Rows %d-%d are not indexed" % (from_row, to_row))
+        base = offsets[from_row]
+        size = offsets[to_row + 1] - base
+        data = self._read(base, size)
+        if len(data) < size:
+            raise IndexError(
+                "Rows %d-%d are past the end of the file" % (from_row, to_row)
+            )
+        rows = []
+        for i in range(from_row, to_row + 1):
+            line = data[offsets[i] - base : offsets[i + 1] - base].rstrip(b"\r\n")
+            rows.append(self.splitter(line.decode(self.encoding, self.errors)))
+        return rows
+
+    def close(self):
+        """Stop indexing and release the file."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._file.close()
+
+    def _read(self, offset, size):
+        # The indexer and the UI thread share one file object
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _index(self):
+        pos = 0
+        block = 1 << 16  # small first block so the first rows appear at once
+        last_report = 0
+        try:
+            while not self._stop.is_set():
+                size = os.fstat(self._file.fileno()).st_size
+                if size < pos:
+                    logger.info("%s was truncated, reindexing", self.path)
+                    self.offsets = array("Q", [0])
+                    pos = 0
+                    self._reset = True
+                if pos < size:
+                    data = self._read(pos, min(block, size - pos))
+                    if not data:
+                        # truncated since fstat; noticed on the next pass
+                        continue
+                    found = array("Q")
+                    i = data.find(b"\n")
+                    while i >= 0:
+                        found.append(pos + i + 1)
+                        i = data.find(b"\n", i + 1)
+                    self.offsets.extend(found)
+                    pos += len(data)
+                    block = self.block_size
+                    if time.time() - last_report >= self.report_interval:
+                        last_report = time.time()
+                        self._schedule_report()
+                    continue
+                if not self.follow:
+                    if self.offsets[-1] < size:
+                        self.offsets.append(size)
+                    self.indexed = True
+                    self._schedule_report()
+                    return
+                self._schedule_report()
+                self._stop.wait(self.poll_interval)
+        except Exception:
+            logger.exception("Error indexing %s", self.path)
+
+    def _schedule_report(self):
+        if self.view is None or self._reporting:
+            return
+        self._reporting = True
+        load_backend().CallAfter(self._report)
+
+    def _report(self):
+        self._reporting = False
+        if self._reset:
+            self._reset = False
+            self.view.update_count(self.count)
+            self.view.refresh()
+        elif self.count != self.view.control.GetItemCount():
+            self.view.grow_count(self.count)
@@ -10,30 +10,44 @@ preventing the enumeration without breaking accessibility.
 """
 import platform
 
-import resource_finder
-
 is_windows = platform.system() == "Windows"
-if is_windows:
-    from ctypes import *
-    from ctypes.wintypes import *
 
-    import commctrl
+# Filled in by _load() on first install, so importing this module stays cheap
+LVM_GETITEMCOUNT = None
+SendMessageW = None
+callback_type = None
+callback_8 = None
+callback_10 = None
+old_proc = None
 
-    SendMessageW = windll.user32.SendMessageW
 
-    callback_type = WINFUNCTYPE(c_int, c_int, c_int, c_int, c_int)
+def _filter_8(hwnd, msg, wParam, lParam):
+    if msg == LVM_GETITEMCOUNT:
+        return 0
+    return old_proc(hwnd, msg, wParam, lParam)
 
-    @callback_type
-    def callback_8(hwnd, msg, wParam, lParam):
-        if msg == commctrl.LVM_GETITEMCOUNT:
-            return 0
-        return old_proc(hwnd, msg, wParam, lParam)
 
-    @callback_type
-    def callback_10(hwnd, msg, wParam, lParam):
-        if msg == commctrl.LVM_GETITEMCOUNT:
-            return 0
-        return SendMessageW(hwnd, msg, wParam, lParam)
+def _filter_10(hwnd, msg, wParam, lParam):
+    if msg == LVM_GETITEMCOUNT:
+        return 0
+    return SendMessageW(hwnd, msg, wParam, lParam)
+
+
+def _load():
+    """Import ctypes and pywin32 and build the SendMessageW replacements."""
+    global LVM_GETITEMCOUNT, SendMessageW, callback_type, callback_8, callback_10
+    if callback_type is not None:
+        return
+    from ctypes import WINFUNCTYPE, c_int, windll
+
+    import commctrl
+
+    LVM_GETITEMCOUNT = commctrl.LVM_GETITEMCOUNT
+    SendMessageW = windll.user32.SendMessageW
+    callback_type = WINFUNCTYPE(c_int, c_int, c_int, c_int, c_int)
+    # Module globals keep the callbacks alive while the hook is installed
+    callback_8 = callback_type(_filter_8)
+    callback_10 = callback_type(_filter_10)
 
 
 def install_iat_hook():
@@ -46,6 +60,11 @@ def install_iat_hook():
     Windows 8 and 10+ require different hooking strategies.
     """
     global old_proc
+    from ctypes import cdll, pointer, windll
+
+    import resource_finder
+
+    _load()
     arch = platform.architecture()[0][:2]
     iat_hook_path = resource_finder.find_application_resource(
         "iat_hook{arch}.dll".format(arch=arch)
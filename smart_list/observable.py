@@ -0,0 +1,108 @@
+"""Models that tell their lists when they change.
+
+Lists subscribe to Observable models as they are displayed. Assigning an
+attribute (or setting a key on an ObservableDict) notifies every owning list
+with the names of the changed fields, and each list repaints only the cells
+of columns that depend on them, batched until the next event loop iteration.
+"""
+from __future__ import absolute_import
+
+import weakref
+
+
+class Observable(object):
+    """Mixin for model classes that notify lists of attribute changes.
+
+    Attributes whose names start with an underscore are not reported.
+    Changes made without assignment (mutating a list attribute in place,
+    for instance) can be reported with notify_changed.
+
+    Example:
+        class Message(Observable):
+            def __init__(self, subject):
+                self.subject = subject
+
+        message.subject = "Re: hello"  # repaints the subject cell only
+    """
+
+    def __setattr__(self, name, value):
+        super(Observable, self).__setattr__(name, value)
+        if not name.startswith("_"):
+            self.notify_changed(name)
+
+    def add_observer(self, observer):
+        """Register an object with a model_changed(model, fields) method.
+
+        Observers are held weakly.
+        """
+        observers = self.__dict__.get("_observers")
+        if observers is None:
+            observers = weakref.WeakSet()
+            object.__setattr__(self, "_observers", observers)
+        observers.add(observer)
+
+    def remove_observer(self, observer):
+        observers = self.__dict__.get("_observers")
+        if observers is not None:
+            observers.discard(observer)
+
+    def notify_changed(self, *fields):
+        """Tell observers that the given fields have changed."""
+        observers = self.__dict__.get("_observers")
+        if not observers:
+            return
+        for observer in list(observers):
+            observer.model_changed(self, fields)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_observers", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+class ObservableDict(Observable, dict):
+    """Dict model reporting changed keys to its lists."""
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.notify_changed(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.notify_changed(key)
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        dict.update(self, changes)
+        if changes:
+            self.notify_changed(*changes)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        present = key in self
+        value = dict.pop(self, key, *default)
+        if present:
+            self.notify_changed(key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self.notify_changed(key)
+        return key, value
+
+    def clear(self):
+        keys = list(self)
+        dict.clear(self)
+        if keys:
+            self.notify_changed(*keys)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
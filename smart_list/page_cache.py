@@ -0,0 +1,156 @@
+"""Page cache shared between VirtualSmartList views.
+
+When several virtual lists display the same data, giving them one PageCache
+means each row is fetched and materialized once, however many views show
+it, and a single invalidate() refreshes every view.
+"""
+from __future__ import absolute_import
+
+import collections
+import weakref
+
+
+class PageCache(object):
+    """Fixed-size pages of models shared by any number of virtual lists.
+
+    Each attached view pins the pages covering its current cache hint; a
+    page stays in memory while at least one view pins it. Unpinned pages are
+    evicted least recently used first once their total weight exceeds
+    budget.
+
+    Args:
+        update_cache: Callable(from_row, to_row) returning the models in
+                      that range, such as a source's update_cache; may
+                      return fewer rows at the end of the data
+        page_size: Rows per page
+        budget: Maximum total weight of unpinned pages; pages pinned by
+                views are kept regardless
+        weigh: Callable(rows) giving a page's weight (len by default, so
+               budget is in rows)
+
+    Example:
+        cache = PageCache(source.update_cache, budget=20000)
+        everything = VirtualSmartList(parent=panel, page_cache=cache)
+        preview = VirtualSmartList(parent=panel, page_cache=cache)
+        cache.invalidate()  # refreshes both lists
+    """
+
+    def __init__(self, update_cache, page_size=100, budget=10000, weigh=len):
+        self.update_cache = update_cache
+        self.page_size = page_size
+        self.budget = budget
+        self.weigh = weigh
+        self.pages = collections.OrderedDict()
+        self.weights = {}
+        self.total = 0
+        self.refs = collections.Counter()
+        self._views = {}
+        self._pins = {}
+
+    def attach(self, view):
+        """Register a view.
+
+        VirtualSmartList detaches itself when its control is destroyed; as a
+        fallback, pins are also released when the view is collected.
+        """
+        key = id(view)
+        self._views[key] = weakref.ref(view)
+        self._pins[key] = set()
+        weakref.finalize(view, self._release, key)
+
+    def detach(self, view):
+        self._release(id(view))
+
+    def views(self):
+        """Live attached views."""
+        return [ref() for ref in list(self._views.values()) if ref() is not None]
+
+    def pin(self, view, from_row, to_row):
+        """Return models from_row..to_row, pinning their pages for view.
+
+        Replaces the pages previously pinned by view. VirtualSmartList uses
+        this as its update_cache when given a page_cache.
+        """
+        first, last = from_row // self.page_size, to_row // self.page_size
+        wanted = set(range(first, last + 1))
+        self._fetch(wanted)
+        key = id(view)
+        old = self._pins.get(key, set())
+        for page in wanted - old:
+            self.refs[page] += 1
+        self._unpin(old - wanted)
+        self._pins[key] = wanted
+        rows = []
+        for page in range(first, last + 1):
+            start = page * self.page_size
+            rows.extend(self.pages[page][max(from_row - start, 0) : to_row + 1 - start])
+        self._evict()
+        return rows
+
+    def get_virtual_item(self, index):
+        page, offset = divmod(index, self.page_size)
+        self._fetch((page,))
+        rows = self.pages[page]
+        self._evict()
+        return rows[offset]
+
+    def invalidate(self, from_row=None, to_row=None):
+        """Drop cached pages (all, or those covering a range) and refresh
+        every attached view."""
+        if from_row is None:
+            pages = list(self.pages)
+        else:
+            if to_row is None:
+                to_row = from_row
+            first, last = from_row // self.page_size, to_row // self.page_size
+            pages = [page for page in self.pages if first <= page <= last]
+        for page in pages:
+            self._drop(page)
+        for view in self.views():
+            view.refresh()
+
+    def _fetch(self, pages):
+        missing = sorted(page for page in pages if page not in self.pages)
+        for page in pages:
+            if page in self.pages:
+                self.pages.move_to_end(page)
+        # fetch each run of consecutive missing pages with one call
+        while missing:
+            run = 1
+            while run < len(missing) and missing[run] == missing[0] + run:
+                run += 1
+            start = missing[0] * self.page_size
+            rows = list(self.update_cache(start, start + run * self.page_size - 1))
+            for i, page in enumerate(missing[:run]):
+                self._store(page, rows[i * self.page_size : (i + 1) * self.page_size])
+            missing = missing[run:]
+
+    def _store(self, page, rows):
+        weight = self.weigh(rows)
+        self.pages[page] = rows
+        self.weights[page] = weight
+        self.total += weight
+
+    def _drop(self, page):
+        del self.pages[page]
+        self.total -= self.weights.pop(page)
+
+    def _evict(self):
+        pinned = sum(self.weights[page] for page in self.refs if page in self.weights)
+        unpinned = self.total - pinned
+        for page in list(self.pages):
+            if unpinned <= self.budget:
+                break
+            if not self.refs[page]:
+                unpinned -= self.weights[page]
+                self._drop(page)
+
+    def _unpin(self, pages):
+        for page in pages:
+            self.refs[page] -= 1
+            if self.refs[page] <= 0:
+                del self.refs[page]
+
+    def _release(self, key):
+        self._views.pop(key, None)
+        self._unpin(self._pins.pop(key, ()))
@@ -9,10 +9,9 @@ from __future__ import absolute_import
 
 import logging
 
-import wx
-
 from . import iat_patch
-from .unified_list import UnifiedList
+from .observable import Observable
+from .unified_list import UnifiedList, load_backend
 
 try:
     unicode
@@ -23,22 +22,36 @@ try:
     from collections.abc import Callable, MutableMapping, MutableSequence
 except ImportError:
     from collections import Callable, MutableMapping, MutableSequence
+import collections
+import contextlib
 import functools
+import itertools
 import platform
 
 from frozendict import frozendict
 
 is_windows = platform.system() == "Windows"
 logger = logging.getLogger(__name__)
+iat_hook_installed = False
+
+
+def install_iat_hook():
+    """Install the Windows 8/10 virtual list fix, once per process.
 
-if is_windows and platform.release() in {
-    "8",
-    "10",
-}:
-    try:
-        iat_patch.install_iat_hook()
-    except:
-        logger.exception("Unable to install IAT hook")
+    Called when the first VirtualSmartList is created rather than at import.
+    """
+    global iat_hook_installed
+    if iat_hook_installed:
+        return
+    iat_hook_installed = True
+    if is_windows and platform.release() in {
+        "8",
+        "10",
+    }:
+        try:
+            iat_patch.install_iat_hook()
+        except:
+            logger.exception("Unable to install IAT hook")
 
 
 def freeze_and_thaw(func):
@@ -57,27 +70,46 @@ def freeze_and_thaw(func):
     return closure
 
 
+def render_rows(columns, models):
+    """Format a batch of models into column values.
+
+    Module-level so that it can be submitted to a process pool. Stops at the
+    first model that fails to render and returns the rows formatted so far
+    together with the exception, letting the caller fail at the same row the
+    serial path would.
+
+    Returns:
+        Tuple of (list of rows, exception or None)
+    """
+    rows = []
+    for model in models:
+        try:
+            rows.append([column.get_model_value(model) for column in columns])
+        except Exception as e:
+            return rows, e
+    return rows, None
+
+
 def freeze_dict(d):
     """Convert mutable dict to immutable frozendict recursively.
 
-    Allows using dicts as index map keys for O(1) lookups.
+    Allows using dicts as index map keys for O(1) lookups. The original
+    dict is left untouched.
     """
-    for k, v in d.items():
-        if isinstance(v, MutableMapping):
-            d[k] = freeze_dict(v)
-        if isinstance(v, MutableSequence):
-            d[k] = freeze_list(v)
-    return frozendict(d)
+    return frozendict((k, freeze_value(v)) for k, v in d.items())
 
 
 def freeze_list(l):
     """Convert mutable list to immutable tuple recursively."""
-    for n, i in enumerate(l):
-        if isinstance(i, MutableSequence):
-            l[n] = freeze_list(i)
-        if isinstance(i, MutableMapping):
-            l[n] = freeze_dict(i)
-    return tuple(l)
+    return tuple(freeze_value(i) for i in l)
+
+
+def freeze_value(value):
+    if isinstance(value, MutableMapping):
+        return freeze_dict(value)
+    if isinstance(value, MutableSequence):
+        return freeze_list(value)
+    return value
 
 
 class SmartList(object):
@@ -91,6 +123,11 @@ class SmartList(object):
         parent: Parent wx widget
         id: Widget ID (default -1)
         choices: Initial items to populate (optional)
+        render_executor: Optional concurrent.futures executor used by
+                         add_items to format rows in parallel
+        render_chunk_size: Number of rows per parallel rendering batch
+        render_lookahead: Number of batches submitted ahead of the one
+                          being appended
         **kwargs: Additional wx.ListCtrl arguments
 
     Example:
@@ -100,6 +137,9 @@ class SmartList(object):
     """
     def __init__(self, parent=None, id=-1, *args, **kwargs):
         choices = kwargs.pop("choices", [])
+        self.render_executor = kwargs.pop("render_executor", None)
+        self.render_chunk_size = kwargs.pop("render_chunk_size", 1000)
+        self.render_lookahead = kwargs.pop("render_lookahead", 2)
         self.control = UnifiedList(
             parent_obj=self, parent=parent, id=id, *args, **kwargs
         )
@@ -108,6 +148,9 @@ class SmartList(object):
         self.list_items = []
         self.index_map = {}
         self.columns = []
+        self._dirty = {}
+        self._flush_pending = False
+        self._observed_rows = {}
         self.add_items(choices)
 
     def set_columns(self, columns):
@@ -130,21 +173,74 @@ class SmartList(object):
         return self.models
 
     @freeze_and_thaw
-    def add_items(self, items):
+    def add_items(self, items, executor=None):
         """Add multiple items to the list.
 
+        When an executor is given (or render_executor was set), column values
+        are computed in parallel, one chunk per task, while the UI thread
+        appends the previously rendered chunk. A ThreadPoolExecutor suits
+        columns that release the GIL; a ProcessPoolExecutor requires picklable
+        models and module-level column callables. Rows are appended in input
+        order and the first rendering error is raised after the rows before
+        it have been added, exactly as in the serial path. Subclasses
+        overriding get_columns_for always use the serial path, since the
+        parallel one calls Column.get_model_value directly.
+
         Args:
             items: Iterable of model objects to display
+            executor: Optional concurrent.futures executor overriding
+                      render_executor for this call
         """
         if self.index_map is None:
             self._rebuild_index_map()
-        for item in items:
-            columns = self.get_columns_for(item)
-            self.control.Append(columns)
-            self.models.append(item)
-            if isinstance(item, MutableMapping):
-                item = freeze_dict(item)
-            self.index_map[item] = len(self.models) - 1
+        if executor is None:
+            executor = self.render_executor
+        if executor is None or type(self).get_columns_for is not SmartList.get_columns_for:
+            for item in items:
+                self._append_row(item, self.get_columns_for(item))
+            return
+        # closing() cancels the chunks still pending if an error is raised
+        with contextlib.closing(self._render_in_parallel(items, executor)) as batches:
+            for chunk, rows, error in batches:
+                for item, columns in zip(chunk, rows):
+                    self._append_row(item, columns)
+                if error is not None:
+                    raise error
+
+    def _append_row(self, item, columns):
+        self.control.Append(columns)
+        self.models.append(item)
+        self.index_map[self.freeze_item(item)] = len(self.models) - 1
+        if isinstance(item, Observable):
+            item.add_observer(self)
+
+    def _render_in_parallel(self, items, executor):
+        """Yield (chunk, rows, error) in input order, keeping a bounded
+        number of chunks rendering ahead of the consumer."""
+        columns = list(self.columns)
+        items = iter(items)
+        lookahead = self.render_lookahead
+        pending = collections.deque()
+
+        def submit_next():
+            chunk = list(itertools.islice(items, self.render_chunk_size))
+            if chunk:
+                pending.append((chunk, executor.submit(render_rows, columns, chunk)))
+            return bool(chunk)
+
+        try:
+            while len(pending) <= lookahead and submit_next():
+                pass
+            while pending:
+                chunk, future = pending.popleft()
+                rows, error = future.result()
+                submit_next()
+                yield chunk, rows, error
+                if error is not None:
+                    return
+        finally:
+            for chunk, future in pending:
+                future.cancel()
 
     def find_index_of_item(self, model):
         """Get list index for a model object.
@@ -180,6 +276,9 @@ class SmartList(object):
             self.index_map[model] = i
 
     def clear(self):
+        for model in self.models:
+            if isinstance(model, Observable):
+                model.remove_observer(self)
         self.control.Clear()
         self.index_map = None
         del self.models[:]
@@ -197,6 +296,8 @@ class SmartList(object):
         if self.index_map is None:
             self._rebuild_index_map()
         for item in items:
+            if isinstance(item, Observable):
+                item.remove_observer(self)
             if isinstance(item, MutableMapping):
                 item = freeze_dict(item)
             self.models.remove(item)
@@ -230,6 +331,8 @@ class SmartList(object):
         self.control.Insert(index, item, columns)
         self.index_map = None
         self.models.insert(index, item)
+        if isinstance(item, Observable):
+            item.add_observer(self)
 
     def update_item(self, item, original=None):
         if original is None:
@@ -237,8 +340,6 @@ class SmartList(object):
         index = self.find_index_of_item(original)
         if index is None:
             logger.warn("item %r not found" % item)
-        item = self.freeze_item(item)
-        original = self.freeze_item(original)
         columns = self.get_columns_for(item)
         for i, c in enumerate(columns):
             # Updating column 0 causes the entire row to be read, so only do it if needed
@@ -246,10 +347,17 @@ class SmartList(object):
                 continue
             self.control.SetColumnText(index, i, c)
 
+        # keep the live object so observable models are still found by identity
+        previous = self.models[index]
         self.models[index] = item
         if self.index_map is not None:
-            del self.index_map[original]
-            self.index_map[item] = index
+            self.index_map.pop(self.freeze_item(original), None)
+            self.index_map[self.freeze_item(item)] = index
+        if previous is not item:
+            if isinstance(previous, Observable):
+                previous.remove_observer(self)
+            if isinstance(item, Observable):
+                item.add_observer(self)
 
     def freeze_item(self, item):
         if isinstance(item, MutableMapping):
@@ -265,6 +373,66 @@ class SmartList(object):
             else:
                 self.add_item(model)
 
+    def model_changed(self, model, fields):
+        """Mark cells of an Observable model dirty after fields changed.
+
+        Only columns depending on the changed fields are repainted, in one
+        batch on the next event loop iteration (see flush_changes).
+
+        Args:
+            model: Model that changed
+            fields: Names of the changed attributes or keys
+        """
+        if isinstance(model, MutableMapping):
+            # the frozen copy used as index map key is now stale, whatever
+            # key changed
+            self.index_map = None
+        columns = [
+            i for i, column in enumerate(self.columns) if column.depends_on_any(fields)
+        ]
+        if not columns:
+            return
+        self._dirty.setdefault(id(model), (model, set()))[1].update(columns)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._flush_pending:
+            self._flush_pending = True
+            load_backend().CallAfter(self.flush_changes)
+
+    def flush_changes(self):
+        """Repaint all cells marked dirty by model_changed."""
+        self._flush_pending = False
+        dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        self.control.Freeze()
+        try:
+            for model, columns in dirty.values():
+                index = self._find_observed_index(model)
+                if index is None:
+                    continue
+                for i in sorted(columns):
+                    value = self.columns[i].get_model_value(model)
+                    # Updating column 0 causes the entire row to be read, so only do it if needed
+                    if i == 0 and self.control.GetColumnText(index, i) == value:
+                        continue
+                    self.control.SetColumnText(index, i, value)
+        finally:
+            self.control.Thaw()
+
+    def _find_observed_index(self, model):
+        # Models are found by identity since a mutated dict no longer
+        # matches its frozen index map key. The cached position is checked
+        # before use, so inserts and deletes need not invalidate it.
+        index = self._observed_rows.get(id(model))
+        if index is None or index >= len(self.models) or self.models[index] is not model:
+            self._observed_rows = dict(
+                (id(m), i) for i, m in enumerate(self.models) if isinstance(m, Observable)
+            )
+            index = self._observed_rows.get(id(model))
+        return index
+
     def SetMinSize(self, size):
         self.control.control.SetMinSize(size)
 
@@ -278,6 +446,27 @@ class SmartList(object):
         return self.control.CanAcceptFocus()
 
 
+class NavigationKeys(object):
+    """Key codes allowed through a virtual list's EVT_CHAR handler.
+
+    Built on first access rather than at class definition, since it
+    needs wx.
+    """
+
+    names = "up down left right home end pageup pagedown space return f4"
+
+    def __init__(self):
+        self.keys = None
+
+    def __get__(self, instance, owner):
+        if self.keys is None:
+            wx = load_backend()
+            self.keys = [
+                getattr(wx, "WXK_%s" % key.upper()) for key in self.names.split()
+            ]
+        return self.keys
+
+
 class VirtualSmartList(SmartList):
     """Virtual list for efficiently displaying large datasets.
 
@@ -289,6 +478,11 @@ class VirtualSmartList(SmartList):
         get_virtual_item: Callable accepting index, returning model object
         update_cache: Optional callable(from_row, to_row) returning list
                       of models for caching
+        source: Optional data source object (such as StreamSource) providing
+                get_virtual_item/update_cache; it is attached to the list
+                and manages the item count itself
+        page_cache: Optional PageCache shared with other views, used in
+                    place of this list's private cache
         parent: Parent wx widget
         **kwargs: Additional wx.ListCtrl arguments (wx.LC_VIRTUAL added automatically)
 
@@ -307,15 +501,22 @@ class VirtualSmartList(SmartList):
         lst.set_columns([Column("ID", "id")])
         lst.update_count(1000000)
     """
-    allowed_navigation_keys = [
-        getattr(wx, "WXK_%s" % key.upper())
-        for key in "up down left right home end pageup pagedown space return f4".split()
-    ]
+    allowed_navigation_keys = NavigationKeys()
 
     def __init__(self, get_virtual_item=None, update_cache=None, *args, **kwargs):
+        source = kwargs.pop("source", None)
+        if source is not None:
+            get_virtual_item = source.get_virtual_item
+            update_cache = getattr(source, "update_cache", None)
+        page_cache = kwargs.pop("page_cache", None)
+        if page_cache is not None:
+            get_virtual_item = page_cache.get_virtual_item
+            update_cache = functools.partial(page_cache.pin, self)
         if get_virtual_item is None:
             raise RuntimeError("get_virtual_item cannot be None")
 
+        wx = load_backend()
+        install_iat_hook()
         kwargs["style"] = kwargs.get("style", 0) | wx.LC_VIRTUAL
         super(VirtualSmartList, self).__init__(*args, **kwargs)
         self.get_virtual_item = get_virtual_item
@@ -325,13 +526,30 @@ class VirtualSmartList(SmartList):
         self.caching_to = 0
         self.update_cache = update_cache
         self.cache = []
+        self.snapshot = None
         self.control.Bind(wx.EVT_CHAR, self.on_list_key_down)
+        self.source = source
+        self.page_cache = page_cache
+        if page_cache is not None:
+            page_cache.attach(self)
+            self.control.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+        if source is not None:
+            source.attach(self)
+
+    def on_destroy(self, evt):
+        # The page_cache.pin partial ties the list into a reference cycle,
+        # so its pins would otherwise only be released by the cyclic GC
+        evt.Skip()
+        if evt.GetEventObject() is self.control.control:
+            self.page_cache.detach(self)
 
     def on_list_key_down(self, evt):
         if evt.KeyCode in self.allowed_navigation_keys:
             evt.Skip()
 
     def OnGetItemText(self, item, col):
+        if self.snapshot is not None:
+            return self.snapshot.get_text(item, col)
         if (
             self.update_cache is not None
             and self.cache
@@ -353,23 +571,151 @@ class VirtualSmartList(SmartList):
         """
         self.control.SetItemCount(count)
 
+    def grow_count(self, count):
+        """Increase the number of virtual items, keeping scroll position.
+
+        Used by data sources whose length is discovered incrementally.
+
+        Args:
+            count: New total, not smaller than the current one
+        """
+        self.control.GrowItemCount(count)
+
     def handle_cache(self, event):
+        if self.snapshot is not None:
+            return
         from_row = event.GetCacheFrom()
         to_row = event.GetCacheTo()
         if self.caching_from <= from_row and self.caching_to >= to_row:
             return
+        self._load_cache(from_row, to_row)
+
+    def _load_cache(self, from_row, to_row):
         self.caching_from = from_row
         self.caching_to = to_row
+        self._release_cache()
         self.cache = self.update_cache(from_row, to_row)
+        for model in self.cache:
+            if isinstance(model, Observable):
+                model.add_observer(self)
+
+    def _release_cache(self):
+        for model in self.cache:
+            if isinstance(model, Observable):
+                model.remove_observer(self)
+
+    def model_changed(self, model, fields):
+        """Mark the row of a cached Observable model for repainting.
+
+        Like SmartList.model_changed this only records the model, so it is
+        safe from any thread; finding its row and checking that the row is
+        in view wait for flush_changes on the UI thread.
+        """
+        if not any(column.depends_on_any(fields) for column in self.columns):
+            return
+        self._dirty[id(model)] = model
+        self._schedule_flush()
+
+    def flush_changes(self):
+        """Repaint the visible rows of models marked dirty by model_changed.
+
+        Virtual rows are rendered on demand, so rows out of view (or no
+        longer cached) need no work: they are read afresh when next shown.
+        """
+        self._flush_pending = False
+        dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        visible = self.control.GetVisibleRange()
+        rows = []
+        for offset, cached in enumerate(self.cache):
+            if dirty.get(id(cached)) is not cached:
+                continue
+            index = self.caching_from + offset
+            if visible is None or visible[0] <= index <= visible[1]:
+                rows.append(index)
+        for index in rows:
+            self.control.RefreshItem(index)
+
+    def show_snapshot(self, snapshot):
+        """Display a warm-start Snapshot until reconcile_snapshot is called.
+
+        The snapshot's count and scroll position are restored and its stored
+        rows are painted without touching the data source; rows it does not
+        cover are blank. A source given to the constructor has already been
+        attached by then, so sources whose attach blocks on a COUNT query or
+        first fetch (SQLiteSource, StreamSource) gain nothing from this.
+
+        Args:
+            snapshot: Snapshot, typically from Snapshot.load
+        """
+        self.snapshot = snapshot
+        self.update_count(snapshot.count)
+        if 0 < snapshot.top < snapshot.count:
+            self.control.ScrollToRow(snapshot.top)
+
+    def reconcile_snapshot(self, count=None):
+        """Switch from the displayed snapshot to live data.
+
+        Loads the visible rows from the data source and repaints those whose
+        text differs from the snapshot, as well as visible rows the snapshot
+        did not cover (painted blank if the user scrolled meanwhile).
+
+        Args:
+            count: Live item count; defaults to the source's count, or to
+                   the current count when there is no source
+        """
+        snapshot, self.snapshot = self.snapshot, None
+        if snapshot is None:
+            return
+        current = self.control.GetItemCount()
+        if count is None:
+            count = getattr(self.source, "count", current)
+        if count > current:
+            self.grow_count(count)
+        elif count < current:
+            self.update_count(count)
+        first = snapshot.first_row
+        last = min(first + len(snapshot.rows), count) - 1
+        visible = self.control.GetVisibleRange()
+        if visible is None:
+            # Visible rows are unknown (DataView): compare the rows the
+            # snapshot covered and repaint everything else
+            start, end = 0, count - 1
+            load_from, load_to = first, last
+        else:
+            start, end = visible[0], min(visible[1], count - 1)
+            load_from, load_to = start, end
+        if end < start:
+            return
+        if self.update_cache is not None and load_from <= load_to:
+            self._load_cache(load_from, load_to)
+            self.caching_to = load_from + len(self.cache) - 1
+        compare_from, compare_to = max(start, first), min(end, last)
+        if compare_from > compare_to:
+            self.control.RefreshItems(start, end)
+            return
+        if start < compare_from:
+            self.control.RefreshItems(start, compare_from - 1)
+        if compare_to < end:
+            self.control.RefreshItems(compare_to + 1, end)
+        for row in range(compare_from, compare_to + 1):
+            for col in range(len(self.columns)):
+                if self.OnGetItemText(row, col) != snapshot.get_text(row, col):
+                    self.control.RefreshItem(row)
+                    break
 
     def refresh(self):
         """Refresh all displayed items and clear cache."""
         self.control.RefreshItems(0, self.control.GetItemCount() - 1)
+        self._release_cache()
         self.cache = []
         self.caching_from = 0
         self.caching_to = 0
 
     def find_index_of_item(self, item):
+        if self.source is not None and hasattr(self.source, "find_index_of_item"):
+            return self.source.find_index_of_item(item)
         for i in range(self.control.GetItemCount()):
             model = self.get_virtual_item(i)
             if model == item:
@@ -396,11 +742,26 @@ class Column(object):
         title: Column header text
         width: Column width in pixels (-1 for auto)
         model_field: Field name or callable for extracting values
+        depends_on: Optional field names the value is computed from; lets
+                    Observable models repaint callable columns selectively
     """
-    def __init__(self, title=None, width=-1, model_field=None):
+    def __init__(self, title=None, width=-1, model_field=None, depends_on=None):
         self.title = title
         self.model_field = model_field
         self.width = width
+        self.depends_on = None if depends_on is None else frozenset(depends_on)
+
+    def depends_on_any(self, fields):
+        """Whether this column's value may change when fields change.
+
+        Callable columns without depends_on are assumed to depend on
+        every field.
+        """
+        if self.depends_on is not None:
+            return not self.depends_on.isdisjoint(fields)
+        if is_callable(self.model_field):
+            return True
+        return self.model_field in fields
 
     def get_model_value(self, model):
         """Extract display value from model object.
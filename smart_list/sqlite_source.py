@@ -0,0 +1,215 @@
+"""SQLite data source for VirtualSmartList.
+
+Pages through a query with keyset pagination (WHERE key > last_key) instead
+of LIMIT/OFFSET, so scrolling deep into a large table costs the same as
+scrolling near the top. Page boundaries are remembered as they are
+discovered and the row count is cached until explicitly refreshed.
+"""
+from __future__ import absolute_import
+
+import collections
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteSource(object):
+    """Virtual list source reading rows from an SQLite query.
+
+    The query must not contain ORDER BY or LIMIT; it is wrapped as a
+    subquery and ordered by key, which must name one or more result columns
+    that together are unique. NULL keys are not supported, since such rows
+    drop out of both keyset comparisons and rank queries. Rows are returned
+    as sqlite3.Row objects, so columns can use result column names as model
+    fields, or are passed through model_factory first.
+
+    Args:
+        connection: sqlite3.Connection, or a callable returning one that is
+                    called on first use
+        query: SELECT statement producing the rows
+        key: Result column name or sequence of names defining the order
+        parameters: Parameters for placeholders in query
+        model_factory: Optional callable(sqlite3.Row) returning the model
+        page_size: Rows fetched per query
+        max_pages: Pages kept in memory
+
+    Example:
+        source = SQLiteSource(
+            conn, "SELECT id, name, email FROM users WHERE active = ?",
+            key="id", parameters=(1,),
+        )
+        lst = VirtualSmartList(parent=panel, source=source)
+    """
+
+    def __init__(
+        self,
+        connection,
+        query,
+        key,
+        parameters=(),
+        model_factory=None,
+        page_size=100,
+        max_pages=100,
+    ):
+        self._connection = connection
+        self.query = query
+        self.key = (key,) if isinstance(key, str) else tuple(key)
+        self.parameters = tuple(parameters)
+        self.model_factory = model_factory
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.view = None
+        self.pages = collections.OrderedDict()
+        # page number -> key of the last row before that page (None for the start)
+        self.boundaries = {0: None}
+        self._count = None
+        if len(self.key) == 1:
+            self._key_sql, self._key_params = self.key[0], "?"
+        else:
+            self._key_sql = "(%s)" % ", ".join(self.key)
+            self._key_params = "(%s)" % ", ".join("?" * len(self.key))
+
+    @property
+    def connection(self):
+        if not isinstance(self._connection, sqlite3.Connection):
+            self._connection = self._connection()
+        return self._connection
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self._execute("SELECT COUNT(*) FROM (%s)" % self.query)[0][0]
+        return self._count
+
+    def attach(self, view):
+        self.view = view
+        view.update_count(self.count)
+
+    def refresh(self):
+        """Drop cached pages and count, then update the attached list."""
+        self.pages.clear()
+        self.boundaries = {0: None}
+        self._count = None
+        if self.view is not None:
+            self.view.update_count(self.count)
+            self.view.refresh()
+
+    def get_virtual_item(self, index):
+        page, offset = divmod(index, self.page_size)
+        rows = self._page(page)
+        if offset >= len(rows):
+            raise IndexError("Row %d is past the end of the query" % index)
+        return rows[offset]
+
+    def update_cache(self, from_row, to_row):
+        rows = []
+        index = from_row
+        while index <= to_row:
+            page, offset = divmod(index, self.page_size)
+            page_rows = self._page(page)
+            rows.extend(page_rows[offset : offset + to_row + 1 - index])
+            if len(page_rows) < self.page_size:
+                break
+            index = (page + 1) * self.page_size
+        return rows
+
+    def find_index_of_item(self, model):
+        """Get the row index of a model with a rank query.
+
+        Raises:
+            ValueError: If no row has the model's key
+        """
+        key = self._key_of(model)
+        where = "%s = %s" % (self._key_sql, self._key_params)
+        if not self._execute(
+            "SELECT 1 FROM (%s) WHERE %s LIMIT 1" % (self.query, where), key
+        ):
+            raise ValueError("Unable to find index of item %r " % model)
+        where = "%s < %s" % (self._key_sql, self._key_params)
+        return self._execute(
+            "SELECT COUNT(*) FROM (%s) WHERE %s" % (self.query, where), key
+        )[0][0]
+
+    def _execute(self, sql, parameters=()):
+        cursor = self.connection.cursor()
+        cursor.row_factory = sqlite3.Row
+        try:
+            return cursor.execute(sql, self.parameters + tuple(parameters)).fetchall()
+        finally:
+            cursor.close()
+
+    def _select(self, after, limit, offset=0):
+        sql = "SELECT * FROM (%s)" % self.query
+        parameters = ()
+        if after is not None:
+            sql += " WHERE %s > %s" % (self._key_sql, self._key_params)
+            parameters = after
+        sql += " ORDER BY %s LIMIT ? OFFSET ?" % ", ".join(self.key)
+        return self._execute(sql, parameters + (limit, offset))
+
+    def _select_reverse(self, upto, limit, offset=0):
+        """Select rows ending offset rows before the row with key upto (or
+        the last row), returned in ascending order."""
+        sql = "SELECT * FROM (%s)" % self.query
+        parameters = ()
+        if upto is not None:
+            sql += " WHERE %s <= %s" % (self._key_sql, self._key_params)
+            parameters = upto
+        sql += " ORDER BY %s LIMIT ? OFFSET ?" % ", ".join(
+            "%s DESC" % name for name in self.key
+        )
+        rows = self._execute(sql, parameters + (limit, offset))
+        rows.reverse()
+        return rows
+
+    def _key_of(self, row):
+        key = []
+        for name in self.key:
+            try:
+                key.append(row[name])
+            except (KeyError, IndexError, TypeError):
+                key.append(getattr(row, name))
+        return tuple(key)
+
+    def _page(self, page):
+        rows = self.pages.get(page)
+        if rows is not None:
+            self.pages.move_to_end(page)
+            return rows
+        if page in self.boundaries:
+            rows = self._select(self.boundaries[page], self.page_size)
+        else:
+            # Jump from the nearest known boundary, reading one extra row
+            # before the page so its own boundary becomes known. Jumps
+            # closer to a boundary further on, or to the end of the data,
+            # read backwards from there instead.
+            start = page * self.page_size
+            end = min(start + self.page_size, self.count) - 1
+            anchor = max(p for p in self.boundaries if p < page)
+            skip = start - 1 - anchor * self.page_size
+            # row index -> key of rows that can anchor a backward read
+            ends = dict(
+                (p * self.page_size - 1, key)
+                for p, key in self.boundaries.items()
+                if p > page
+            )
+            ends.setdefault(self.count - 1, None)
+            last = min(ends)
+            if end >= start and last - end < skip:
+                logger.debug("Seeking %d rows back from row %d", last - end, last)
+                rows = self._select_reverse(ends[last], end - start + 2, last - end)
+            else:
+                logger.debug("Seeking %d rows from page %d", skip, anchor)
+                rows = self._select(self.boundaries[anchor], self.page_size + 1, skip)
+            if rows:
+                self.boundaries[page] = self._key_of(rows[0])
+            rows = rows[1:]
+        if rows:
+            self.boundaries[page + 1] = self._key_of(rows[-1])
+        if self.model_factory is not None:
+            rows = [self.model_factory(row) for row in rows]
+        self.pages[page] = rows
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rows
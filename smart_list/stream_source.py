@@ -0,0 +1,264 @@
+"""Streaming data source for VirtualSmartList.
+
+Feeds a virtual list from an iterator or async iterator whose length is
+unknown up front (paginated APIs, database cursors, generators). Rows are
+pulled in chunks as cache hints approach the known end, and the item count
+grows as they arrive instead of being fixed before anything is shown.
+"""
+from __future__ import absolute_import
+
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import logging
+
+from .unified_list import load_backend
+
+logger = logging.getLogger(__name__)
+
+
+async def _read_async(iterator, count):
+    rows = []
+    async for row in iterator:
+        rows.append(row)
+        if len(rows) >= count:
+            break
+    return rows
+
+
+class StreamSource(object):
+    """Incrementally materialized data source for VirtualSmartList.
+
+    Pulls the first chunk as soon as it is attached to a list, then reads
+    further chunks when a cache hint comes within prefetch rows of the known
+    end. The list's item count only ever grows, so the scroll position and
+    selection are kept.
+
+    Chunks are read inside the list's cache hint handler, so without an
+    executor pulling from the stream must be cheap. Given an executor, the
+    chunk ahead of the visible rows is read on it and handed back to the UI
+    thread, and the UI only waits when scrolled past everything read so far;
+    the stream must then tolerate being read from the executor's threads
+    (sqlite3 cursors, for one, do not).
+
+    If reopen is given, only max_rows rows are kept in memory; evicted chunks
+    are refetched by calling reopen(start), which must return an iterator (or
+    async iterator) yielding rows from index start onwards. A stream that can
+    only be restarted can be adapted with
+    lambda start: itertools.islice(make_stream(), start, None). Without
+    reopen every row read is kept, since there is no way to get it back.
+
+    Args:
+        stream: Iterable, iterator or async iterator yielding models
+        chunk_size: Number of rows read from the stream at a time
+        prefetch: Distance from the known end at which the next chunk is
+                  read (defaults to chunk_size)
+        max_rows: Maximum rows kept in memory when reopen is available
+        reopen: Optional callable(start) returning a stream positioned at
+                row start
+        loop: Event loop owning an async stream. It must run in another
+              thread, since the list waits for chunks it needs
+              synchronously; passing the loop running on the UI thread (as
+              with wxasync) raises RuntimeError. When omitted a private
+              loop is used.
+        executor: Optional concurrent.futures executor on which the next
+                  chunk is read ahead
+
+    Example:
+        source = StreamSource(api.iter_messages(), chunk_size=100)
+        lst = VirtualSmartList(parent=panel, source=source)
+    """
+
+    def __init__(
+        self,
+        stream,
+        chunk_size=200,
+        prefetch=None,
+        max_rows=10000,
+        reopen=None,
+        loop=None,
+        executor=None,
+    ):
+        self.chunk_size = chunk_size
+        self.prefetch = chunk_size if prefetch is None else prefetch
+        self.max_rows = max_rows
+        self.reopen = reopen
+        self.loop = loop
+        self.executor = executor
+        self._own_loop = None
+        self.stream = self._open(stream)
+        self.chunks = collections.OrderedDict()
+        self.count = 0
+        self.exhausted = False
+        self.view = None
+        self._seek = None
+        self._growing = False
+        self._prefetching = None
+        self._wanted = 0
+
+    def attach(self, view):
+        """Bind to a VirtualSmartList and show the first chunk."""
+        self.view = view
+        if not self.count and not self.exhausted:
+            self._pull()
+        view.update_count(self.count)
+
+    def get_virtual_item(self, index):
+        if index >= self.count and not self.exhausted:
+            while index >= self.count and not self.exhausted:
+                self._pull()
+            self._schedule_grow()
+        if index < 0 or index >= self.count:
+            raise IndexError("Row %d is past the end of the stream" % index)
+        return self._chunk(index // self.chunk_size)[index % self.chunk_size]
+
+    def update_cache(self, from_row, to_row):
+        # With an executor only rows about to be shown are waited for; the
+        # rest of the prefetch distance is read in the background
+        needed = to_row if self.executor is not None else to_row + self.prefetch
+        if needed >= self.count and not self.exhausted:
+            while needed >= self.count and not self.exhausted:
+                self._pull()
+            self._schedule_grow()
+        self._wanted = to_row + self.prefetch
+        self._prefetch()
+        rows = []
+        index = from_row
+        end = min(to_row + 1, self.count)
+        while index < end:
+            number, offset = divmod(index, self.chunk_size)
+            chunk = self._chunk(number)
+            rows.extend(chunk[offset : offset + end - index])
+            index = (number + 1) * self.chunk_size
+        return rows
+
+    def close(self):
+        """Release the private event loop used for async streams."""
+        if self._prefetching is not None:
+            self._wait_for_prefetch()
+            self._prefetching = None
+        if self._own_loop is not None:
+            self._own_loop.close()
+            self._own_loop = None
+
+    def _open(self, stream):
+        if hasattr(stream, "__aiter__"):
+            return stream.__aiter__()
+        return iter(stream)
+
+    def _check_loop(self):
+        if self.loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            raise RuntimeError(
+                "StreamSource cannot wait on the event loop running in the "
+                "calling thread; run it in another thread"
+            )
+
+    def _read(self, iterator, count):
+        if not hasattr(iterator, "__anext__"):
+            return list(itertools.islice(iterator, count))
+        if self.loop is not None:
+            self._check_loop()
+            coro = _read_async(iterator, count)
+            return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+        coro = _read_async(iterator, count)
+        if self._own_loop is None:
+            self._own_loop = asyncio.new_event_loop()
+        return self._own_loop.run_until_complete(coro)
+
+    def _pull(self):
+        """Read the next chunk from the stream.
+
+        The count stays a multiple of chunk_size until the stream ends, so
+        chunk numbers line up with row indexes. A chunk being read ahead on
+        the executor is waited for instead.
+        """
+        if self._prefetching is not None:
+            self._wait_for_prefetch()
+            future, self._prefetching = self._prefetching, None
+            rows = future.result()
+        else:
+            rows = self._read(self.stream, self.chunk_size)
+        if len(rows) < self.chunk_size:
+            self.exhausted = True
+        if rows:
+            self._store(self.count // self.chunk_size, rows)
+            self.count += len(rows)
+
+    def _prefetch(self):
+        if (
+            self.executor is None
+            or self._prefetching is not None
+            or self.exhausted
+            or self._wanted < self.count
+        ):
+            return
+        future = self.executor.submit(self._read, self.stream, self.chunk_size)
+        self._prefetching = future
+        future.add_done_callback(
+            lambda future: load_backend().CallAfter(self._prefetched, future)
+        )
+
+    def _wait_for_prefetch(self):
+        if not self._prefetching.done() and hasattr(self.stream, "__anext__"):
+            self._check_loop()
+        concurrent.futures.wait([self._prefetching])
+
+    def _prefetched(self, future):
+        if future is not self._prefetching:
+            return  # already taken by _pull
+        self._pull()
+        self._grow()
+        self._prefetch()
+
+    def _store(self, number, rows):
+        self.chunks[number] = rows
+        self.chunks.move_to_end(number)
+        if self.reopen is None:
+            return
+        while len(self.chunks) > 1 and len(self.chunks) * self.chunk_size > self.max_rows:
+            self.chunks.popitem(last=False)
+
+    def _chunk(self, number):
+        rows = self.chunks.get(number)
+        if rows is not None:
+            self.chunks.move_to_end(number)
+            return rows
+        start = number * self.chunk_size
+        if self._prefetching is not None:
+            # the private event loop cannot run two reads at once
+            self._wait_for_prefetch()
+        if self._seek is None or self._seek[0] != start:
+            logger.debug("Reopening stream at row %d", start)
+            self._seek = [start, self._open(self.reopen(start))]
+        rows = self._read(self._seek[1], self.chunk_size)
+        self._seek[0] += len(rows)
+        expected = min(self.chunk_size, self.count - start)
+        if len(rows) < expected:
+            self._seek = None
+            raise IndexError(
+                "Reopened stream returned %d rows at row %d, expected %d"
+                % (len(rows), start, expected)
+            )
+        rows = rows[:expected]
+        self._store(number, rows)
+        return rows
+
+    def _schedule_grow(self):
+        # Changing the item count from inside a cache hint or paint handler
+        # is not safe, so it is deferred to the next event loop iteration.
+        if self.view is None or self._growing:
+            return
+        self._growing = True
+        load_backend().CallAfter(self._grow)
+
+    def _grow(self):
+        self._growing = False
+        if self.count > self.view.control.GetItemCount():
+            self.view.grow_count(self.count)
@@ -1,22 +1,41 @@
 import platform
 from logging import getLogger
 
-import wx
-
 logger = getLogger("smart_list.unified_list")
 try:
     unicode
 except NameError:
     unicode = str
 
+# Set by load_backend() when the first list is created; until then wx and
+# dataview are resolved through the module __getattr__ below
+backend = None
 
-try:
-    from wx import dataview
-except ImportError:
-    dataview = None
+is_mac = platform.system() == "Darwin"
 
 
-is_mac = platform.system() == "Darwin"
+def load_backend():
+    """Import wxPython and the native control classes, returning wx.
+
+    Deferred until the first UnifiedList is constructed so that importing
+    smart_list does not pay for wx in processes that never show a list.
+    Other modules needing wx call this rather than importing it themselves.
+    """
+    global wx, dataview, backend
+    if backend is None:
+        from . import wx_backend
+
+        wx = wx_backend.wx
+        dataview = wx_backend.dataview
+        backend = wx_backend
+    return wx
+
+
+def __getattr__(name):
+    if name in ("wx", "dataview", "VirtualCtrl", "VirtualDataViewModel"):
+        load_backend()
+        return getattr(backend, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class UnifiedList(object):
@@ -31,13 +50,14 @@ class UnifiedList(object):
     """
 
     def __init__(self, parent=None, id=None, parent_obj=None, *args, **kwargs):
+        load_backend()
         self.use_dataview = is_mac
         if self.use_dataview and dataview is None:
             raise RuntimeError("wx.dataview required and not available")
         self.virtual = kwargs.get("style", 0) & wx.LC_VIRTUAL
         if not self.use_dataview:
             kwargs["style"] = kwargs.get("style", 0) | wx.LC_REPORT
-            self.control = VirtualCtrl(
+            self.control = backend.VirtualCtrl(
                 parent_obj=parent_obj, parent=parent, id=id, *args, **kwargs
             )
         else:
@@ -50,7 +70,7 @@ class UnifiedList(object):
                 self.control = dataview.DataViewCtrl(
                     parent=parent, id=id, *args, **kwargs
                 )
-                self.wx_model = VirtualDataViewModel(parent_obj)
+                self.wx_model = backend.VirtualDataViewModel(parent_obj)
                 self.control.AssociateModel(self.wx_model)
             else:
                 self.control = dataview.DataViewListCtrl(
@@ -181,53 +201,51 @@ class UnifiedList(object):
         else:
             self.control.SetItemCount(count)
 
-    def RefreshItems(self, from_item, to_item):
-        self.control.RefreshItems(from_item, to_item)
-
-
-if dataview is not None:
-
-    class VirtualDataViewModel(dataview.PyDataViewVirtualListModel):
-        """DataView model for virtual lists on macOS.
-
-        Delegates value retrieval to parent SmartList's OnGetItemText.
-        """
-        def __init__(self, parent_obj):
-            self.count = 0
-            super(VirtualDataViewModel, self).__init__(self.count)
-            self.parent = parent_obj
-            self.columns = []
+    # Above this many new rows, DataView models are reset in one go rather
+    # than notified row by row
+    max_appended_rows = 100
 
-        def GetCount(self):
-            return self.count
-
-        def SetCount(self, count):
-            self.count = count
-            self.Reset(count)
-
-        def GetColumnCount(self):
-            return len(self.columns)
-
-        def GetColumnType(self, col):
-            return "string"
-
-        def GetValueByRow(self, row, col):
-            res = ""
-            try:
-                res = self.parent.OnGetItemText(row, col)
-            except Exception as e:
-                logger.exception("Error retrieving row %r col %r" % (row, col))
-                raise
-            if res is None:
-                res = ""
-            return res
+    def GrowItemCount(self, count):
+        if not self.use_dataview:
+            self.control.SetItemCount(count)
+        elif count - self.wx_model.GetCount() <= self.max_appended_rows:
+            self.wx_model.GrowCount(count)
+        else:
+            # Reset() loses the selection and scroll position, so put them back
+            selected = self.GetSelectedIndex()
+            top = -1
+            if hasattr(self.control, "GetTopItem"):
+                item = self.control.GetTopItem()
+                if item.IsOk():
+                    top = self.wx_model.GetRow(item)
+            self.wx_model.SetCount(count)
+            if top > 0:
+                self.ScrollToRow(top)
+            if selected != -1:
+                self.control.Select(self.wx_model.GetItem(selected))
 
+    def RefreshItems(self, from_item, to_item):
+        self.control.RefreshItems(from_item, to_item)
 
-class VirtualCtrl(wx.ListCtrl):
-    """ListView subclass that delegates virtual item requests to parent."""
-    def __init__(self, parent_obj=None, *args, **kwargs):
-        super(VirtualCtrl, self).__init__(*args, **kwargs)
-        self.parent = parent_obj
+    def RefreshItem(self, index):
+        if self.use_dataview:
+            self.wx_model.RowChanged(index)
+        else:
+            self.control.RefreshItem(index)
 
-    def OnGetItemText(self, idx, col):
-        return self.parent.OnGetItemText(idx, col)
+    def ScrollToRow(self, index):
+        """Scroll so that index is the first visible row where possible."""
+        if self.use_dataview:
+            self.control.EnsureVisible(self.wx_model.GetItem(index))
+            return
+        last = min(index + self.control.GetCountPerPage() - 1, self.GetItemCount() - 1)
+        self.control.EnsureVisible(last)
+        self.control.EnsureVisible(index)
+
+    def GetVisibleRange(self):
+        """Return (first, last) visible row indexes, or None if unknown."""
+        if self.use_dataview:
+            return None
+        top = self.control.GetTopItem()
+        last = top + self.control.GetCountPerPage() - 1
+        return top, min(last, self.GetItemCount() - 1)
@@ -0,0 +1,139 @@
+"""Warm-start snapshots for instant first paint of virtual lists.
+
+A Snapshot records a list's item count, scroll position and the rendered
+text of the rows around it. Saved at shutdown and loaded at startup, it lets
+a VirtualSmartList paint immediately while the real data source is still
+loading; once the source is ready, only rows whose text differs are
+repainted.
+
+File layout (little-endian): header, etag bytes, a uint32 byte length for
+every cell in row-major order, then the UTF-8 text of the cells.
+"""
+from __future__ import absolute_import
+
+import logging
+import os
+import struct
+import sys
+from array import array
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SLWS"
+VERSION = 1
+# magic, version, column count, etag length, item count, top row, first row, row count
+HEADER = struct.Struct("<4sHHIQQQI")
+
+
+class Snapshot(object):
+    """Rendered rows of a virtual list around its scroll position.
+
+    Args:
+        count: Total number of items
+        top: Index of the first visible row
+        first_row: Index of the first stored row
+        rows: List of rows, each a list of column strings
+        etag: Version of the underlying data; load() rejects snapshots
+              whose etag differs from the expected one
+    """
+
+    def __init__(self, count, top, first_row, rows, etag=""):
+        self.count = count
+        self.top = top
+        self.first_row = first_row
+        self.rows = rows
+        self.etag = etag
+
+    @classmethod
+    def capture(cls, view, etag="", radius=100):
+        """Snapshot the rows within radius of view's top row."""
+        count = view.control.GetItemCount()
+        visible = view.control.GetVisibleRange()
+        top = visible[0] if visible is not None else max(view.get_selected_index(), 0)
+        first_row = max(top - radius, 0)
+        last_row = min(top + radius, count - 1)
+        rows = [
+            [view.OnGetItemText(row, col) for col in range(len(view.columns))]
+            for row in range(first_row, last_row + 1)
+        ]
+        return cls(count, top, first_row, rows, etag)
+
+    def get_text(self, row, col):
+        """Stored text of a cell, or an empty string if it was not stored."""
+        index = row - self.first_row
+        if 0 <= index < len(self.rows) and col < len(self.rows[index]):
+            return self.rows[index][col]
+        return ""
+
+    def save(self, path):
+        """Write the snapshot, replacing path atomically."""
+        columns = max([len(row) for row in self.rows] or [0])
+        cells = [
+            (row[col] if col < len(row) else "").encode("utf-8")
+            for row in self.rows
+            for col in range(columns)
+        ]
+        lengths = array("I", [len(cell) for cell in cells])
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        etag = self.etag.encode("utf-8")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    columns,
+                    len(etag),
+                    self.count,
+                    self.top,
+                    self.first_row,
+                    len(self.rows),
+                )
+            )
+            f.write(etag)
+            f.write(lengths.tobytes())
+            f.write(b"".join(cells))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, etag=None):
+        """Read a snapshot, or return None if it is missing, corrupt, from
+        another format version, or (when etag is given) out of date."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, version, columns, etag_length, count, top, first_row, row_count = (
+                HEADER.unpack_from(data)
+            )
+            if magic != MAGIC or version != VERSION:
+                logger.debug("Ignoring snapshot %s with unknown format", path)
+                return None
+            pos = HEADER.size
+            stored_etag = data[pos : pos + etag_length].decode("utf-8")
+            if etag is not None and stored_etag != etag:
+                logger.debug("Ignoring stale snapshot %s", path)
+                return None
+            pos += etag_length
+            lengths = array("I")
+            lengths.frombytes(data[pos : pos + row_count * columns * lengths.itemsize])
+            if len(lengths) != row_count * columns:
+                raise ValueError("truncated length table")
+            if sys.byteorder == "big":
+                lengths.byteswap()
+            pos += len(lengths) * lengths.itemsize
+            if pos + sum(lengths) != len(data):
+                raise ValueError("size mismatch")
+            rows = []
+            for _ in range(row_count):
+                row = []
+                for length in lengths[len(rows) * columns : (len(rows) + 1) * columns]:
+                    row.append(data[pos : pos + length].decode("utf-8"))
+                    pos += length
+                rows.append(row)
+        except (IOError, OSError):
+            return None
+        except (struct.error, ValueError) as e:
+            logger.warning("Ignoring corrupt snapshot %s: %s", path, e)
+            return None
+        return cls(count, top, first_row, rows, stored_etag)
@@ -0,0 +1,70 @@
+"""Native control classes for UnifiedList.
+
+Kept apart from unified_list so that wx is only imported once a list is
+actually created (see unified_list.load_backend).
+"""
+from logging import getLogger
+
+import wx
+
+logger = getLogger("smart_list.unified_list")
+
+try:
+    from wx import dataview
+except ImportError:
+    dataview = None
+
+
+if dataview is not None:
+
+    class VirtualDataViewModel(dataview.PyDataViewVirtualListModel):
+        """DataView model for virtual lists on macOS.
+
+        Delegates value retrieval to parent SmartList's OnGetItemText.
+        """
+        def __init__(self, parent_obj):
+            self.count = 0
+            super(VirtualDataViewModel, self).__init__(self.count)
+            self.parent = parent_obj
+            self.columns = []
+
+        def GetCount(self):
+            return self.count
+
+        def SetCount(self, count):
+            self.count = count
+            self.Reset(count)
+
+        def GrowCount(self, count):
+            # One notification per row; UnifiedList.GrowItemCount switches
+            # to SetCount() for large steps
+            while self.count < count:
+                self.count += 1
+                self.RowAppended()
+
+        def GetColumnCount(self):
+            return len(self.columns)
+
+        def GetColumnType(self, col):
+            return "string"
+
+        def GetValueByRow(self, row, col):
+            res = ""
+            try:
+                res = self.parent.OnGetItemText(row, col)
+            except Exception as e:
+                logger.exception("Error retrieving row %r col %r" % (row, col))
+                raise
+            if res is None:
+                res = ""
+            return res
+
+
+class VirtualCtrl(wx.ListCtrl):
+    """ListView subclass that delegates virtual item requests to parent."""
+    def __init__(self, parent_obj=None, *args, **kwargs):
+        super(VirtualCtrl, self).__init__(*args, **kwargs)
+        self.parent = parent_obj
+
+    def OnGetItemText(self, idx, col):
+        return self.parent.OnGetItemText(idx, col)
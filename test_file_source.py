@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+
+import wx
+from smart_list import FileSource
+
+
+class RecordingControl(object):
+ def __init__(self):
+  self.count = 0
+
+ def GetItemCount(self):
+  return self.count
+
+
+class RecordingView(object):
+ def __init__(self):
+  self.control = RecordingControl()
+
+ def update_count(self, count):
+  self.control.count = count
+
+ def grow_count(self, count):
+  self.control.count = count
+
+ def refresh(self):
+  pass
+
+
+def wait_for(condition, timeout=10):
+ deadline = time.time() + timeout
+ while not condition():
+  if time.time() > deadline:
+   raise AssertionError("Timed out waiting for the indexer")
+  time.sleep(0.01)
+
+
+class FollowTruncationTest(unittest.TestCase):
+ def setUp(self):
+  self.app = wx.App()
+  fd, self.path = tempfile.mkstemp()
+  with os.fdopen(fd, "w") as f:
+   for i in range(100000):
+    f.write("line %d\n" % i)
+  self.source = FileSource(self.path, follow=True, poll_interval=0.05)
+  self.source.attach(RecordingView())
+  wait_for(lambda: self.source.count == 100000)
+
+ def tearDown(self):
+  self.source.close()
+  os.remove(self.path)
+
+ def test_truncated_rows_raise_index_error(self):
+  self.assertEqual(self.source.update_cache(90000, 90000), [("line 90000",)])
+  # what logrotate's copytruncate does
+  with open(self.path, "r+") as f:
+   f.truncate(0)
+  with self.assertRaises(IndexError):
+   self.source.update_cache(90000, 90005)
+
+ def test_reindexes_after_truncation(self):
+  with open(self.path, "r+") as f:
+   f.truncate(0)
+  with open(self.path, "a") as f:
+   f.write("first\nsecond\n")
+  wait_for(lambda: self.source.count == 2)
+  self.assertEqual(self.source.update_cache(0, 1), [("first",), ("second",)])
+
+
+if __name__ == "__main__":
+ unittest.main()